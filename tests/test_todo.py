@@ -1,10 +1,18 @@
+import http.client
 import json
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
 
 import pytest
+import typer
 from typer.testing import CliRunner
 
-from todo import ReturnCode, __app_name__, __version__, cli
+from todo import ReturnCode, __app_name__, __version__, cli, completion, server
 from todo.todo import TodoController
+from todo.watch import FileWatcher, LiveView, clip, redraw
 
 runner = CliRunner()
 
@@ -128,3 +136,328 @@ def test_add(mock_json_file, title, description, priority, expected):
     assert model.todo.title == expected[0]["title"]
     assert model.todo.description == expected[0]["description"]
     assert model.todo.priority == expected[0]["priority"]
+
+
+def test_session_batches_operations(mock_json_file):
+    controller = TodoController(mock_json_file)
+
+    with controller.session() as session:
+        added = session.add("Feed the cat.")
+        session.add("Walk the dog.")
+        session.complete(added.todo.id)
+        session.remove_completed()
+        assert session.dirty
+        assert json.loads(mock_json_file.read_text())[0]["title"] == "Get some milk"
+        assert len(json.loads(mock_json_file.read_text())) == 1
+
+    assert not session.dirty
+    assert session.error == ReturnCode.SUCCESS
+    todo_list = controller._db_handler.read_todos().todo_list
+    assert [todo["title"] for todo in todo_list] == ["Get some milk", "Walk the dog."]
+
+
+def test_session_rolls_back_on_exception(mock_json_file, monkeypatch):
+    controller = TodoController(mock_json_file)
+    before = mock_json_file.read_text()
+
+    with pytest.raises(ZeroDivisionError):
+        with controller.session() as session:
+            session.remove_all()
+            monkeypatch.setattr(controller._db_handler, "read_todos", pytest.fail)  # Rollback must not read again
+            1 / 0
+
+    assert mock_json_file.read_text() == before
+    assert not session.dirty
+
+
+def test_session_read_error(mock_json_file):
+    controller = TodoController(mock_json_file)
+    mock_json_file.write_text('[{"id": "half-writ')
+
+    with controller.session() as session:
+        assert session.read_error == ReturnCode.JSON_ERROR
+        assert session.list() == []
+
+
+def test_session_explicit_rollback(mock_json_file):
+    controller = TodoController(mock_json_file)
+    before = mock_json_file.read_text()
+
+    with controller.session() as session:
+        session.add("Feed the cat.")
+        session.rollback()
+        assert session.closed
+
+    assert mock_json_file.read_text() == before
+
+
+def test_session_refuses_operations_after_exit(mock_json_file):
+    controller = TodoController(mock_json_file)
+
+    with controller.session() as session:
+        session.add("Feed the cat.")
+
+    with pytest.raises(RuntimeError):
+        session.add("Walk the dog.")
+    with pytest.raises(RuntimeError):
+        session.commit()
+    assert len(controller.list()) == 2
+
+
+def test_session_does_not_write_when_clean(mock_json_file):
+    controller = TodoController(mock_json_file)
+    mock_json_file.write_text("[]")
+    mtime = mock_json_file.stat().st_mtime_ns
+
+    with controller.session() as session:
+        assert session.list() == []
+        assert session.complete("unknown-id").error == ReturnCode.ID_ERROR
+
+    assert mock_json_file.stat().st_mtime_ns == mtime
+
+
+def test_redraw_rewrites_only_changed_lines():
+    assert redraw([], ["a", "b"]) == "\x1b[2Ka\n\x1b[2Kb\n"
+    assert redraw(["a", "b", "c"], ["a", "x", "c"]) == "\x1b[3F\n\x1b[2Kx\n\n"
+    assert redraw(["a", "b", "c"], ["a"]) == "\x1b[3F\n\x1b[J"
+
+
+def test_clip_keeps_styles():
+    line = typer.style("0123456789", fg=typer.colors.BLUE)
+    assert clip(line, 20) == line
+    assert typer.unstyle(clip(line, 4)) == "0123"
+    assert clip(line, 4).endswith("\x1b[0m")
+    assert clip("0123456789", 4) == "0123\x1b[0m"
+    assert clip("日本語のタスク", 5) == "日本\x1b[0m"
+    assert clip("cafe\u0301s", 5) == "cafe\u0301s"
+
+
+def test_live_view(monkeypatch):
+    monkeypatch.setattr("shutil.get_terminal_size", lambda: os.terminal_size((8, 4)))
+    view = LiveView(is_tty=True)
+
+    assert view.render(["a", "b"]) == "\x1b[H\x1b[2Ja\nb\n"  # First frame
+    assert view.render(["a", "b"]) == ""
+    assert view.render(["a", "0123456789"]) == "\x1b[2F\n\x1b[2K01234567\x1b[0m\n"
+    assert view.render(["a", "b", "c", "d"]).startswith("\x1b[H\x1b[2J")  # Taller than the terminal
+
+    plain_view = LiveView(is_tty=False)
+    assert plain_view.render(["a", "b"]) == "a\nb\n"
+    assert plain_view.render(["a", "b"]) == ""
+
+
+def test_watch_keeps_last_frame_on_read_error(mock_json_file, monkeypatch):
+    frames = []
+    monkeypatch.setattr(cli, "echo", lambda text, nl=True: frames.append(text))
+
+    waits = []
+
+    def wait(self, timeout=None):
+        waits.append(timeout)
+        if len(waits) == 3:
+            raise KeyboardInterrupt
+        mock_json_file.write_text('[{"id": "half-writ')  # Caught in the middle of a rewrite
+
+    monkeypatch.setattr(FileWatcher, "wait", wait)
+    with pytest.raises(typer.Exit):
+        cli._watch_todo_list(TodoController(mock_json_file), None, None)
+
+    assert waits[0] is None and waits[1] is not None  # Retried shortly after the failed read
+    assert len(frames) == 1
+    assert "Get some milk" in frames[0]
+
+
+@pytest.mark.parametrize("use_inotify", [True, False])
+def test_file_watcher_detects_changes(mock_json_file, use_inotify):
+    controller = TodoController(mock_json_file)
+
+    with FileWatcher(mock_json_file, interval=0.01, use_inotify=use_inotify) as watcher:
+        assert not watcher.wait(timeout=0.05)
+        controller.add("Feed the cat.")
+        assert watcher.wait(timeout=1)
+        assert not watcher.changed()
+
+
+def test_write_todos_keeps_id_cache_in_sync(mock_json_file):
+    controller = TodoController(mock_json_file)
+    assert completion.complete_ids(mock_json_file) == []
+
+    first = controller.add("Feed the cat.").todo
+    second = controller.add("Walk the dog, " + "very " * 20 + "far.").todo
+
+    matches = completion.complete_ids(mock_json_file)
+    assert [todo_id for todo_id, _ in matches] == sorted([" b72f3c9c-5f91-11ee-8fd4-00155d3d2824", first.id, second.id])
+    assert completion.complete_ids(mock_json_file, first.id[:8]) == [(first.id, "Feed the cat.")]
+    assert completion.complete_ids(mock_json_file, second.id) == [(second.id, second.title[: completion.TITLE_WIDTH])]
+    assert completion.complete_ids(mock_json_file, "zzz") == []
+
+    controller.remove(first.id)
+    assert completion.complete_ids(mock_json_file, first.id) == []
+
+
+def test_complete_ids_on_large_cache(tmp_path):
+    db_file = tmp_path / "todo.json"
+    todo_list = [{"id": f"{index:08x}-todo", "title": f"Task ção {index}"} for index in range(100_000)]
+    completion.write_id_cache(db_file, todo_list)
+
+    assert completion.complete_ids(db_file, "0001869f") == [("0001869f-todo", "Task ção 99999")]
+    assert len(completion.complete_ids(db_file, "000100")) == 256
+    assert len(completion.complete_ids(db_file, "", limit=10)) == 10
+
+
+@pytest.fixture
+def configured_db(mock_json_file, tmp_path, monkeypatch):
+    config_file = tmp_path / "config.ini"
+    config_file.write_text(f"[General]\ndatabase = {mock_json_file}\n")
+    monkeypatch.setattr(cli.config, "CONFIG_FILE_PATH", config_file)
+    return mock_json_file
+
+
+def test_complete_todo_id_never_writes_database(configured_db):
+    configured_db.write_text('[{"id": "half-writ')
+    assert cli._TodoIdType().shell_complete(None, None, "") == []
+    assert configured_db.read_text() == '[{"id": "half-writ'
+    assert not completion.get_id_cache_path(configured_db).exists()
+
+
+def test_complete_todo_id_builds_missing_cache(configured_db):
+    before = configured_db.read_text()
+    items = cli._TodoIdType().shell_complete(None, None, " b72f")
+    assert [(item.value, item.help) for item in items] == [(" b72f3c9c-5f91-11ee-8fd4-00155d3d2824", "Get some milk")]
+    assert configured_db.read_text() == before
+
+
+def test_complete_todo_id_is_limited(configured_db):
+    completion.write_id_cache(configured_db, [{"id": f"{index:08x}", "title": ""} for index in range(1000)])
+    assert len(cli._TodoIdType().shell_complete(None, None, "")) == completion.COMPLETION_LIMIT
+
+
+def test_completion_finds_config_file_like_typer():
+    assert completion._get_config_file_path() == Path(typer.get_app_dir(__app_name__)) / "config.ini"
+
+
+@pytest.fixture
+def http_connection(mock_json_file):
+    http_server = server.make_server(TodoController(mock_json_file), port=0)
+    thread = threading.Thread(target=http_server.serve_forever, args=(0.01,), daemon=True)
+    thread.start()
+    connection = http.client.HTTPConnection(*http_server.server_address, timeout=5)
+    yield connection
+    connection.close()
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def _request(connection, method, url, body=None, headers=None):
+    connection.request(method, url, body=json.dumps(body) if body is not None else None, headers=headers or {})
+    response = connection.getresponse()
+    data = response.read()
+    return response, json.loads(data) if data else None
+
+
+def test_http_api(http_connection):
+    response, todo_list = _request(http_connection, "GET", "/todos")
+    assert response.status == 200
+    assert [todo["title"] for todo in todo_list] == ["Get some milk"]
+    etag = response.getheader("ETag")
+
+    response, _ = _request(http_connection, "GET", "/todos", headers={"If-None-Match": etag})
+    assert response.status == 304
+
+    response, todo = _request(http_connection, "POST", "/todos", {"title": "Feed the cat.", "priority": 1})
+    assert response.status == 201
+    assert todo["title"] == "Feed the cat." and todo["priority"] == 1
+    assert response.getheader("ETag") != etag
+
+    response, _ = _request(http_connection, "DELETE", "/todos?all=true", headers={"If-Match": etag})
+    assert response.status == 412
+
+    response, todo = _request(http_connection, "POST", f"/todos/{todo['id']}/complete")
+    assert response.status == 200 and todo["completed"]
+
+    response, todo_list = _request(http_connection, "GET", "/todos?completed=true", headers={"If-None-Match": etag})
+    assert response.status == 200
+    assert [todo["title"] for todo in todo_list] == ["Feed the cat."]
+
+    response, _ = _request(http_connection, "DELETE", "/todos?completed=true")
+    assert response.status == 200
+
+    response, error = _request(http_connection, "GET", f"/todos/{todo['id']}")
+    assert response.status == 404
+    assert error == {"error": "to-do id error"}
+
+    response, _ = _request(http_connection, "POST", "/todos", {"title": "Feed the cat.", "priority": 7})
+    assert response.status == 400
+
+
+@pytest.mark.parametrize(
+    "method, url",
+    [
+        ("DELETE", "/todos"),
+        ("DELETE", "/todos?completed=false"),
+        ("DELETE", "/todos?completed=maybe"),
+        ("DELETE", "/todos?completed=true&all=true"),
+        ("GET", "/todos?priority=high"),
+        ("GET", "/todos?priority=7"),
+        ("GET", "/todos?completed=maybe"),
+    ],
+)
+def test_http_api_rejects_bad_queries(http_connection, mock_json_file, method, url):
+    before = mock_json_file.read_text()
+
+    response, error = _request(http_connection, method, url)
+    assert response.status == 400
+    assert "error" in error
+    assert mock_json_file.read_text() == before
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        {},
+        {"title": ""},
+        {"title": []},
+        {"title": ["a", 1]},
+        {"title": {"a": 1}},
+        {"title": 5},
+        {"title": "x", "description": 5},
+        {"title": "x", "description": ["a", None]},
+        {"title": "x", "priority": True},
+        {"title": "x", "priority": 1.0},
+        {"title": "x", "priority": "1"},
+        {"title": "x", "priority": 3},
+        ["x"],
+    ],
+)
+def test_http_api_rejects_bad_todos(http_connection, mock_json_file, body):
+    before = mock_json_file.read_text()
+
+    response, error = _request(http_connection, "POST", "/todos", body)
+    assert response.status == 400
+    assert "error" in error
+    assert mock_json_file.read_text() == before
+
+
+@pytest.mark.parametrize("url", ["/todos", "/todos/0a50d7fa-5f92"])
+def test_http_api_reports_unreadable_database(http_connection, mock_json_file, url):
+    mock_json_file.write_text('[{"id": "half-writ')
+
+    response, error = _request(http_connection, "GET", url)
+    assert response.status == 503
+    assert response.getheader("ETag") is None
+    assert "error" in error
+
+
+def test_http_api_rejects_bad_content_length(http_connection):
+    http_connection.putrequest("POST", "/todos")
+    http_connection.putheader("Content-Length", "lots")
+    http_connection.endheaders()
+    response = http_connection.getresponse()
+
+    assert response.status == 400
+    assert json.loads(response.read()) == {"error": "invalid Content-Length"}
+
+
+def test_cli_does_not_import_http_server():
+    code = "import sys, todo.cli; print('http.server' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], capture_output=True, text=True).stdout.strip() == "False"
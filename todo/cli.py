@@ -1,12 +1,16 @@
 """Provides the Command-Line Interface for the application"""
 
+import sys
 from pathlib import Path
 from typing import List, Optional
 
-from typer import Argument, Exit, Option, Typer, colors, confirm, echo, secho
+from click import Parameter, ParamType
+from click.shell_completion import CompletionItem
+from typer import Argument, Context, Exit, Option, Typer, colors, confirm, echo, secho, style
 
-from todo import ERRORS, ReturnCode, __app_name__, __version__, config, database
-from todo.todo import TodoController
+from todo import ERRORS, ReturnCode, __app_name__, __version__, completion, config, database
+from todo.todo import Todo, TodoController
+from todo.watch import DEFAULT_POLL_INTERVAL, FileWatcher, LiveView
 
 app = Typer()
 
@@ -93,6 +97,12 @@ def list_all(
         max=3,
         help="Filter to-do items by priority",
     ),
+    watch: Optional[bool] = Option(
+        False,
+        "--watch",
+        "-w",
+        help="Keep the list on screen and redraw it when the database changes",
+    ),
 ) -> None:
     """List to-do items"""
     controller = get_todoer()
@@ -107,13 +117,25 @@ def list_all(
     elif not_completed is not None:
         status = not not_completed
 
+    if watch:
+        _watch_todo_list(controller, status, priority)
+        return
+
     todo_list = controller.list(status, priority)
 
     if len(todo_list) == 0:
         secho("There are no tasks in the to-do list yet", fg=colors.RED)
         raise Exit()
 
-    secho("\nto-do list:\n", fg=colors.BLUE, bold=True)
+    for line in _render_todo_list(todo_list):
+        echo(line)
+
+
+def _render_todo_list(todo_list: List[Todo]) -> List[str]:
+    """Render the to-do list table as styled lines"""
+    if len(todo_list) == 0:
+        return [style("There are no tasks in the to-do list yet", fg=colors.RED)]
+
     columns = (
         f"{' '* 16} ID {' ' * 16} ",
         "| Priority ",
@@ -121,29 +143,78 @@ def list_all(
         "| Description  ",
     )
     headers = "".join(columns)
-    secho(headers, fg=colors.BLUE, bold=True)
-    secho("-" * len(headers), fg=colors.BLUE)
+    lines = [
+        "",
+        style("to-do list:", fg=colors.BLUE, bold=True),
+        "",
+        style(headers, fg=colors.BLUE, bold=True),
+        style("-" * len(headers), fg=colors.BLUE),
+    ]
 
     for todo in todo_list:
         description = (" - " + todo.description) if todo.description else ""
         description = description[: len(columns[3])] + "..." if len(description) > len(columns[3]) else description
-        secho(
-            f"{todo.id} "
-            f"|   {todo.priority.name}{(len(columns[1]) - len(str(todo.priority.name))-4) * ' '}"
-            f"|   {todo.completed}{(len(columns[2]) - len(str(todo.completed)) - 4) * ' '}"
-            f"| {todo.title}{description}{(len(columns[3]) - len(description) - 2) * ' '}",
-            fg=colors.BLUE,
+        lines.append(
+            style(
+                f"{todo.id} "
+                f"|   {todo.priority.name}{(len(columns[1]) - len(str(todo.priority.name))-4) * ' '}"
+                f"|   {todo.completed}{(len(columns[2]) - len(str(todo.completed)) - 4) * ' '}"
+                f"| {todo.title}{description}{(len(columns[3]) - len(description) - 2) * ' '}",
+                fg=colors.BLUE,
+            )
         )
-    secho("-" * len(headers) + "\n", fg=colors.BLUE)
-    # for todo in model.todo_list:
-    #     echo(f"{todo.id} {todo.title} {todo.priority.name.lower()} {todo.completed}")
-    # else:
-    #     secho(f'Listing to-do items failed with "{ERRORS[model.error]}"', fg=colors.RED)
-    #     raise Exit(1)
+    lines.append(style("-" * len(headers), fg=colors.BLUE))
+    lines.append("")
+    return lines
+
+
+def _watch_todo_list(controller: TodoController, status: Optional[bool], priority: Optional[int]) -> None:
+    """Keep the to-do list on screen, redrawing only the rows that change"""
+    view = LiveView(sys.stdout.isatty())
+    with FileWatcher(controller.db_path) as watcher:
+        try:
+            while True:
+                with controller.session() as session:
+                    read_error = session.read_error
+                    todo_list = session.list(status, priority)
+                if read_error != ReturnCode.SUCCESS:
+                    # Most likely the file is being rewritten, so keep the last frame and read it again shortly
+                    watcher.wait(timeout=DEFAULT_POLL_INTERVAL)
+                    continue
+                echo(view.render(_render_todo_list(todo_list)), nl=False)
+                watcher.wait()
+        except KeyboardInterrupt:
+            raise Exit()
+
+
+class _TodoIdType(ParamType):
+    """To-do ID parameter, completed from the database's ID cache with the titles as help"""
+
+    name = "todo_id"
+
+    def shell_complete(self, ctx: Context, param: Parameter, incomplete: str) -> List[CompletionItem]:
+        if not config.CONFIG_FILE_PATH.exists():
+            return []
+        db_path = database.get_database_path(config.CONFIG_FILE_PATH)
+        if not completion.get_id_cache_path(db_path).exists():
+            # Databases written before the cache existed: build the cache, but never touch the database
+            read = database.DatabaseHandler(db_path).read_todos()
+            if read.error != ReturnCode.SUCCESS:
+                return []
+            try:
+                completion.write_id_cache(db_path, read.todo_list)
+            except OSError:
+                return []
+        return [
+            CompletionItem(todo_id, help=title)
+            for todo_id, title in completion.complete_ids(db_path, incomplete, limit=completion.COMPLETION_LIMIT)
+        ]
 
 
 @app.command()
-def complete(todo_id: str = Argument(..., help="ID of the to-do item to complete")) -> None:
+def complete(
+    todo_id: str = Argument(..., help="ID of the to-do item to complete", click_type=_TodoIdType())
+) -> None:
     """Mark a to-do item as completed"""
     controller = get_todoer()
 
@@ -157,7 +228,9 @@ def complete(todo_id: str = Argument(..., help="ID of the to-do item to complete
 
 @app.command()
 def remove(
-    todo_id: Optional[str] = Option(None, "--id", help="ID of the to-do item to remove"),
+    todo_id: Optional[str] = Option(
+        None, "--id", help="ID of the to-do item to remove", click_type=_TodoIdType()
+    ),
     completed: Optional[bool] = Option(
         None,
         "--completed",
@@ -225,6 +298,30 @@ def remove(
             _remove(todo_id, completed)
 
 
+@app.command(name="http")
+def serve_http(
+    host: str = Option(config.DEFAULT_HTTP_HOST, "--host", help="Address to listen on"),
+    port: int = Option(config.DEFAULT_HTTP_PORT, "--port", "-p", min=0, max=65535, help="Port to listen on"),
+) -> None:
+    """Serve the to-do list as a JSON HTTP API"""
+    from todo import server  # Only this command needs the HTTP machinery, keep it out of every other start-up
+
+    controller = get_todoer()
+
+    try:
+        http_server = server.make_server(controller, host, port)
+    except OSError as error:
+        secho(f'Starting the HTTP server failed with "{error.strerror}"', fg=colors.RED)
+        raise Exit(1)
+
+    secho(f"Serving the to-do list on http://{host}:{http_server.server_port}", fg=colors.GREEN)
+    with http_server:
+        try:
+            http_server.serve_forever()
+        except KeyboardInterrupt:
+            raise Exit()
+
+
 def _version_callback(value: bool) -> None:
     """Print the version of the application"""
     if value:
@@ -0,0 +1,157 @@
+"""Provides shell completion for to-do IDs from a sidecar ID cache
+
+The cache sits next to the to-do database and holds one fixed-width record per to-do
+item, sorted by ID, with the ID and a short title. Fixed-width sorted records let a
+lookup binary search the file instead of parsing it, so completion stays fast on big
+databases. This module only depends on the standard library, so running it as
+``python -m todo.completion [INCOMPLETE]`` answers without starting the whole CLI.
+The README shows how to hook it into bash and zsh completion.
+"""
+
+import configparser
+import mmap
+import os
+import sys
+from bisect import bisect_left
+from pathlib import Path
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from todo import __app_name__
+
+ID_CACHE_SUFFIX = ".ids"
+ID_CACHE_MAGIC = b"todo-ids 1"
+TITLE_WIDTH = 40
+COMPLETION_LIMIT = 100
+
+
+def get_id_cache_path(db_path: Path) -> Path:
+    """Return the path to the ID cache of a to-do database.
+
+    Args:
+        db_path (Path): Path to the to-do database.
+
+    Returns:
+        Path: Path to the ID cache.
+    """
+    db_path = Path(db_path)
+    return db_path.with_name(db_path.name + ID_CACHE_SUFFIX)
+
+
+def _fit(text: str, width: int) -> bytes:
+    """Encode text into exactly ``width`` bytes, truncating or padding with spaces."""
+    data = " ".join(text.split()).encode("utf-8")[:width]
+    data = data.decode("utf-8", errors="ignore").encode("utf-8")  # Don't leave half a character behind
+    return data.ljust(width)
+
+
+def write_id_cache(db_path: Path, todo_list: Iterable[Any]) -> None:
+    """Write the ID cache of a to-do database.
+
+    Args:
+        db_path (Path): Path to the to-do database.
+        todo_list (Iterable[Any]): To-do items, as stored in the database.
+
+    Raises:
+        OSError: If the cache can't be written.
+    """
+    entries = sorted((str(todo["id"]).encode("utf-8"), str(todo["title"])) for todo in todo_list)
+    id_width = max((len(todo_id) for todo_id, _ in entries), default=0)
+    header = ID_CACHE_MAGIC + f" {id_width} {TITLE_WIDTH}\n".encode()
+    records = [todo_id.ljust(id_width) + b"\t" + _fit(title, TITLE_WIDTH) + b"\n" for todo_id, title in entries]
+
+    cache_path = get_id_cache_path(db_path)
+    tmp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with tmp_path.open("wb") as cache:
+        cache.write(header)
+        cache.writelines(records)
+    os.replace(tmp_path, cache_path)  # Readers never see a half-written cache
+
+
+class _Records(Sequence):
+    """Sorted fixed-width ID cache records, seen as a sequence of their ID fields"""
+
+    def __init__(self, data: Any, offset: int, id_width: int, title_width: int) -> None:
+        self._data = data
+        self._offset = offset
+        self._id_width = id_width
+        self._size = id_width + title_width + 2
+        self._count = (len(data) - offset) // self._size
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> bytes:
+        start = self._offset + index * self._size
+        return self._data[start:start + self._id_width].rstrip(b" ")
+
+    def title(self, index: int) -> bytes:
+        start = self._offset + index * self._size + self._id_width + 1
+        return self._data[start:start + self._size - self._id_width - 2].rstrip(b" ")
+
+
+def complete_ids(db_path: Path, incomplete: str = "", limit: Optional[int] = None) -> List[Tuple[str, str]]:
+    """Return the to-do IDs starting with a prefix, with their short titles.
+
+    Args:
+        db_path (Path): Path to the to-do database.
+        incomplete (str, optional): Prefix typed so far. Defaults to "".
+        limit (int, optional): Maximum number of matches to return. Defaults to no limit.
+
+    Returns:
+        List[Tuple[str, str]]: Matching IDs and titles, sorted by ID. Empty if there is no cache.
+    """
+    try:
+        with get_id_cache_path(db_path).open("rb") as cache:
+            header = cache.readline()
+            fields = header.split()
+            if len(fields) != 4 or b" ".join(fields[:2]) != ID_CACHE_MAGIC:
+                return []
+            if os.fstat(cache.fileno()).st_size <= len(header):
+                return []
+            with mmap.mmap(cache.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                records = _Records(data, len(header), int(fields[2]), int(fields[3]))
+                prefix = incomplete.encode("utf-8")
+                matches = []
+                index = bisect_left(records, prefix)
+                while index < len(records) and (limit is None or len(matches) < limit):
+                    todo_id = records[index]
+                    if not todo_id.startswith(prefix):
+                        break
+                    matches.append((todo_id.decode("utf-8"), records.title(index).decode("utf-8")))
+                    index += 1
+                return matches
+    except (OSError, ValueError):
+        return []
+
+
+def _get_config_file_path() -> Path:
+    """Locate the configuration file like ``typer.get_app_dir`` does, without importing typer."""
+    if sys.platform.startswith("win"):
+        app_dir = Path(os.environ.get("APPDATA") or Path.home()) / __app_name__
+    elif sys.platform == "darwin":
+        app_dir = Path.home() / "Library" / "Application Support" / __app_name__
+    else:
+        config_home = os.environ.get("XDG_CONFIG_HOME") or Path.home() / ".config"
+        app_dir = Path(config_home) / "-".join(__app_name__.split()).lower()
+    return app_dir / "config.ini"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Print the to-do IDs matching a prefix, one ``<id>\\t<title>`` per line"""
+    argv = sys.argv[1:] if argv is None else argv
+    incomplete = argv[0] if argv else ""
+
+    config_parser = configparser.ConfigParser()
+    config_parser.read(_get_config_file_path())
+    try:
+        db_path = Path(config_parser["General"]["database"])
+    except KeyError:
+        return 1
+
+    matches = complete_ids(db_path, incomplete, limit=COMPLETION_LIMIT)
+    sys.stdout.write("".join(f"{todo_id}\t{title}\n" for todo_id, title in matches))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
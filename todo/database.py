@@ -6,6 +6,7 @@ from pathlib import Path
 from typing import Any, List, NamedTuple
 
 from todo import ReturnCode
+from todo.completion import write_id_cache
 
 DEFAULT_DB_FILE_PATH = Path.home().joinpath(
     "." + Path.home().stem + "_todo.json"
@@ -23,6 +24,10 @@ class DatabaseHandler:
     def __init__(self, db_path: Path) -> None:
         self._db_path = db_path
 
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
     def read_todos(self) -> DBResponse:
         try:
             with self._db_path.open("r") as db:
@@ -37,9 +42,18 @@ class DatabaseHandler:
         try:
             with self._db_path.open("w") as db:
                 json.dump(todo_list, db, indent=4)
-            return DBResponse(todo_list, ReturnCode.SUCCESS)
         except OSError:  # Catch file IO problems
             return DBResponse(todo_list, ReturnCode.DB_WRITE_ERROR)
+        _update_id_cache(self._db_path, todo_list)
+        return DBResponse(todo_list, ReturnCode.SUCCESS)
+
+
+def _update_id_cache(db_path: Path, todo_list: List[Any]) -> None:
+    """Keep the ID cache used by shell completion in sync with the database"""
+    try:
+        write_id_cache(db_path, todo_list)
+    except OSError:  # The cache is only a completion aid, so never fail a write over it
+        pass
 
 
 def get_database_path(config_file: Path) -> Path:
@@ -67,6 +81,7 @@ def init_database(db_path: Path) -> ReturnCode:
     """
     try:
         db_path.write_text("[]")  # Empty to-do list
-        return ReturnCode.SUCCESS
     except OSError:
         return ReturnCode.DB_WRITE_ERROR
+    _update_id_cache(db_path, [])
+    return ReturnCode.SUCCESS
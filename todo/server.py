@@ -0,0 +1,283 @@
+"""Provides a local HTTP API over the to-do controller
+
+Endpoints:
+
+    GET    /todos                  List to-do items, filtered by ?completed= and ?priority=
+    POST   /todos                  Add a to-do item from a {"title", "description", "priority"} body
+    DELETE /todos?completed=true   Remove the completed to-do items
+    DELETE /todos?all=true         Remove all to-do items
+    GET    /todos/<id>             Get a to-do item
+    POST   /todos/<id>/complete    Mark a to-do item as completed
+    DELETE /todos/<id>             Remove a to-do item
+
+Every response carries a strong ETag derived from the database file's version. A GET with
+a matching If-None-Match gets a 304 from a single stat() call, without the database being
+read. A write with a stale If-Match gets a 412. Writes are serialized with a server-side lock.
+Malformed requests, including unparseable query values, get a 400. Reads of a database that
+can't be read or parsed, for instance while another process rewrites it, get a 503. Errors
+never carry an ETag.
+"""
+
+import json
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from todo import ERRORS, ReturnCode, __app_name__, __version__
+from todo.config import DEFAULT_HTTP_HOST, DEFAULT_HTTP_PORT
+from todo.todo import TodoController, TodoModel, TodoPriority
+from todo.watch import file_signature
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_ERROR_STATUS = {
+    ReturnCode.ID_ERROR: HTTPStatus.NOT_FOUND,
+}
+
+
+class TodoHTTPServer(ThreadingHTTPServer):
+    """HTTP server sharing one to-do controller between its request threads"""
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], controller: TodoController) -> None:
+        super().__init__(address, TodoRequestHandler)
+        self.controller = controller
+        self.lock = threading.Lock()
+
+    def etag(self) -> str:
+        """Return the strong ETag of the database's current version"""
+        signature = file_signature(self.controller.db_path)
+        if signature is None:
+            return '"missing"'
+        return '"{:x}-{:x}-{:x}"'.format(*signature)
+
+
+class TodoRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep connections alive between requests
+    server_version = f"{__app_name__}/{__version__}"
+    server: TodoHTTPServer
+
+    def do_GET(self) -> None:
+        path, query = self._parse_url()
+        if path != ["todos"] and not (len(path) == 2 and path[0] == "todos"):
+            self._send_error(HTTPStatus.NOT_FOUND, "not found")
+            return
+
+        etag = self.server.etag()
+        if self._etag_matches(self.headers.get("If-None-Match"), etag):
+            self._send_empty(HTTPStatus.NOT_MODIFIED, etag)
+            return
+
+        if path == ["todos"]:
+            try:
+                completed = _parse_bool(query.get("completed"))
+                priority = _parse_priority(query.get("priority"))
+            except ValueError as error:
+                self._send_error(HTTPStatus.BAD_REQUEST, str(error))
+                return
+            with self.server.lock, self.server.controller.session() as session:
+                etag = self.server.etag()
+                read_error = session.read_error
+                todo_list = session.list(completed, priority)
+            if read_error != ReturnCode.SUCCESS:
+                self._send_read_error(read_error)
+                return
+            self._send_stream(HTTPStatus.OK, (todo.__dict__ for todo in todo_list), etag)
+        else:
+            with self.server.lock, self.server.controller.session() as session:
+                etag = self.server.etag()
+                read_error = session.read_error
+                model = session.get(path[1])
+            if read_error != ReturnCode.SUCCESS:
+                self._send_read_error(read_error)
+                return
+            self._send_model(model, etag)
+
+    def do_POST(self) -> None:
+        path, _ = self._parse_url()
+        body = self._read_json()
+        if body is None:
+            return
+
+        if path == ["todos"]:
+            if not isinstance(body, dict) or not _is_text(body.get("title")) or not body["title"]:
+                self._send_error(HTTPStatus.BAD_REQUEST, "a title is required, as a string or a list of strings")
+                return
+            if not _is_text(body.get("description", "")):
+                self._send_error(HTTPStatus.BAD_REQUEST, "description must be a string or a list of strings")
+                return
+            priority = body.get("priority", 0)
+            if type(priority) is not int or priority not in list(TodoPriority):  # Rejects booleans too
+                self._send_error(HTTPStatus.BAD_REQUEST, "priority must be 0 (low), 1 (medium) or 2 (high)")
+                return
+            self._write(
+                lambda controller: controller.add(body["title"], body.get("description", ""), body.get("priority", 0)),
+                HTTPStatus.CREATED,
+            )
+        elif len(path) == 3 and path[0] == "todos" and path[2] == "complete":
+            self._write(lambda controller: controller.complete(path[1]))
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "not found")
+
+    def do_DELETE(self) -> None:
+        path, query = self._parse_url()
+        if self._read_json() is None:
+            return
+
+        if path == ["todos"]:
+            try:
+                completed = _parse_bool(query.get("completed"))
+                remove_all = _parse_bool(query.get("all"))
+            except ValueError as error:
+                self._send_error(HTTPStatus.BAD_REQUEST, str(error))
+                return
+            if completed and not remove_all:
+                self._write(lambda controller: controller.remove_completed())
+            elif remove_all and completed is None:
+                self._write(lambda controller: controller.remove_all())
+            else:
+                self._send_error(HTTPStatus.BAD_REQUEST, "use ?completed=true or ?all=true to remove to-do items")
+        elif len(path) == 2 and path[0] == "todos":
+            self._write(lambda controller: controller.remove(path[1]))
+        else:
+            self._send_error(HTTPStatus.NOT_FOUND, "not found")
+
+    def _write(self, operation, status: HTTPStatus = HTTPStatus.OK) -> None:
+        with self.server.lock:
+            etag = self.server.etag()
+            if_match = self.headers.get("If-Match")
+            if if_match is not None and not self._etag_matches(if_match, etag):
+                self._send_error(HTTPStatus.PRECONDITION_FAILED, "the to-do list changed", etag)
+                return
+            model = operation(self.server.controller)
+            etag = self.server.etag()
+        self._send_model(model, etag, status)
+
+    def _parse_url(self) -> Tuple[List[str], Dict[str, str]]:
+        url = urlsplit(self.path)
+        path = [part for part in url.path.split("/") if part]
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return path, query
+
+    def _read_json(self) -> Optional[Any]:
+        """Read the JSON request body, answering with a 400 and returning None if it is invalid"""
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self.close_connection = True  # The body's end is unknown, so the connection can't be reused
+            self._send_error(HTTPStatus.BAD_REQUEST, "invalid Content-Length")
+            return None
+        if length == 0:
+            return {}
+        try:
+            return json.loads(self.rfile.read(length))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            self._send_error(HTTPStatus.BAD_REQUEST, "invalid JSON body")
+            return None
+
+    @staticmethod
+    def _etag_matches(header: Optional[str], etag: str) -> bool:
+        if header is None:
+            return False
+        return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+    def _send_model(self, model: TodoModel, etag: str, status: HTTPStatus = HTTPStatus.OK) -> None:
+        if model.error != ReturnCode.SUCCESS:
+            error_status = _ERROR_STATUS.get(model.error, HTTPStatus.INTERNAL_SERVER_ERROR)
+            self._send_error(error_status, ERRORS.get(model.error, model.error.name.lower()))
+            return
+        self._send_json(status, model.todo.__dict__ if model.todo else None, etag)
+
+    def _send_read_error(self, error: ReturnCode) -> None:
+        """Answer a database that couldn't be read with a 503 and no ETag, so nobody caches it"""
+        self._send_error(HTTPStatus.SERVICE_UNAVAILABLE, ERRORS.get(error, error.name.lower()))
+
+    def _send_error(self, status: HTTPStatus, message: str, etag: Optional[str] = None) -> None:
+        self._send_json(status, {"error": message}, etag)
+
+    def _send_json(self, status: HTTPStatus, data: Any, etag: Optional[str] = None) -> None:
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if etag is not None:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_empty(self, status: HTTPStatus, etag: str) -> None:
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+    def _send_stream(self, status: HTTPStatus, items: Iterable[Any], etag: str) -> None:
+        """Send a JSON array with chunked transfer encoding, without building the whole body in memory"""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("ETag", etag)
+        self.end_headers()
+
+        buffer = ["["]
+        size = 1
+        for index, item in enumerate(items):
+            data = ("," if index else "") + json.dumps(item)
+            buffer.append(data)
+            size += len(data)
+            if size >= STREAM_CHUNK_SIZE:
+                self._write_chunk("".join(buffer))
+                buffer, size = [], 0
+        buffer.append("]")
+        self._write_chunk("".join(buffer))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: str) -> None:
+        chunk = data.encode("utf-8")
+        self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass  # Keep the terminal quiet, the dashboard polls a lot
+
+
+def _is_text(value: Any) -> bool:
+    """Check that a value is a string or a list of strings, as the controller accepts for titles"""
+    return isinstance(value, str) or (isinstance(value, list) and all(isinstance(item, str) for item in value))
+
+
+def _parse_bool(value: Optional[str]) -> Optional[bool]:
+    if value is None:
+        return None
+    if value.lower() in ("1", "true", "yes"):
+        return True
+    if value.lower() in ("0", "false", "no"):
+        return False
+    raise ValueError(f"invalid boolean {value!r}")
+
+
+def _parse_priority(value: Optional[str]) -> Optional[int]:
+    if value is None:
+        return None
+    if not value.isdigit() or int(value) not in list(TodoPriority):
+        raise ValueError(f"invalid priority {value!r}, it must be 0 (low), 1 (medium) or 2 (high)")
+    return int(value)
+
+
+def make_server(
+    controller: TodoController, host: str = DEFAULT_HTTP_HOST, port: int = DEFAULT_HTTP_PORT
+) -> TodoHTTPServer:
+    """Create the HTTP API server.
+
+    Args:
+        controller (TodoController): Controller of the to-do database to serve.
+        host (str, optional): Address to listen on. Defaults to localhost.
+        port (int, optional): Port to listen on. Defaults to 8000.
+
+    Returns:
+        TodoHTTPServer: The server, ready to ``serve_forever``.
+    """
+    return TodoHTTPServer((host, port), controller)
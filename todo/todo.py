@@ -1,6 +1,8 @@
 """Provides code to connect the CLI with the to-do database"""
+from contextlib import contextmanager
 from enum import IntEnum
-from typing import List, NamedTuple, Optional
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional
 from uuid import uuid1
 
 from todo import ReturnCode
@@ -39,14 +41,57 @@ class TodoModel(NamedTuple):
     error: int
 
 
-class TodoController:
-    def __init__(self, db_path: str) -> None:
-        self._db_handler = DatabaseHandler(db_path)
+class TodoSession:
+    """Unit of work over the to-do database.
+
+    The to-do list is read once when the session is created, every operation is
+    applied in memory and the list is written back once by :meth:`commit`, and only
+    if an operation actually changed it. Once the session is closed, by :meth:`close`
+    or :meth:`rollback`, any further operation raises a ``RuntimeError``.
+    """
+
+    def __init__(self, db_handler: DatabaseHandler) -> None:
+        self._db_handler = db_handler
+        self.error = ReturnCode.SUCCESS
+        read = self._db_handler.read_todos()
+        self._todo_list: List[Dict[str, Any]] = read.todo_list
+        self._read_error = read.error
+        self._dirty = False
+        self._closed = False
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("the to-do session is closed")
+
+    @property
+    def read_error(self) -> ReturnCode:
+        """Return code of the read that loaded the session
+
+        Operations only refuse to run on DB_READ_ERROR. Like the controller always did, they
+        treat a database that isn't valid JSON (JSON_ERROR) as an empty to-do list.
+        """
+        return self._read_error
+
+    @property
+    def dirty(self) -> bool:
+        """Whether the session holds changes that were not committed yet"""
+        return self._dirty
+
+    @property
+    def closed(self) -> bool:
+        """Whether the session was closed, by :meth:`close` or :meth:`rollback`"""
+        return self._closed
+
+    def _find(self, todo_id: str) -> Optional[Dict[str, Any]]:
+        for todo in self._todo_list:
+            if str(todo["id"]).startswith(todo_id) and len(todo_id) > 5:
+                return todo
+        return None
 
     def add(
         self, title: str | List[str], description: str | List[str] = "", priority: TodoPriority = TodoPriority.Low
     ) -> TodoModel:
-        """Add a to-do item to the database
+        """Add a to-do item to the session
 
         Args:
             title (str): The title of the to-do item
@@ -54,8 +99,10 @@ class TodoController:
             priority (TodoPriority, optional): To-do priority. It may be low, medium or high. Defaults to Low.
 
         Returns:
-            Todo: The to-do item added to the database
+            Todo: The to-do item added to the session
         """
+        self._check_open()
+
         if isinstance(title, list):
             title = " ".join(title)
         if isinstance(description, list):
@@ -63,33 +110,30 @@ class TodoController:
 
         todo = Todo(str(uuid1()), title, description, priority, False)
 
-        read = self._db_handler.read_todos()
-
-        if read.error == ReturnCode.DB_READ_ERROR:
-            return TodoModel(todo, read.error)
-
-        read.todo_list.append(todo.__dict__)
+        if self._read_error == ReturnCode.DB_READ_ERROR:
+            return TodoModel(todo, self._read_error)
 
-        write = self._db_handler.write_todos(read.todo_list)
+        self._todo_list.append(todo.__dict__)
+        self._dirty = True
 
-        return TodoModel(todo, write.error)
+        return TodoModel(todo, ReturnCode.SUCCESS)
 
-    def get(self, todo_id):
-        read = self._db_handler.read_todos()
+    def get(self, todo_id: str) -> TodoModel:
+        self._check_open()
 
-        if read.error == ReturnCode.DB_READ_ERROR:
-            return TodoModel(None, read.error)
+        if self._read_error == ReturnCode.DB_READ_ERROR:
+            return TodoModel(None, self._read_error)
 
-        for todo in read.todo_list:
-            if str(todo["id"]).startswith(todo_id) and len(todo_id) > 5:
-                return TodoModel(Todo(**todo), ReturnCode.SUCCESS)
+        todo = self._find(todo_id)
+        if todo is None:
+            return TodoModel(None, ReturnCode.ID_ERROR)
 
-        return TodoModel(None, ReturnCode.ID_ERROR)
+        return TodoModel(Todo(**todo), ReturnCode.SUCCESS)
 
     def list(self, completed: Optional[bool] = None, priority: Optional[int] = None) -> List[Todo]:
-        read = self._db_handler.read_todos()
+        self._check_open()
 
-        todo_list = read.todo_list
+        todo_list = self._todo_list
 
         todo_list = (
             [todo for todo in todo_list if todo["completed"] == completed] if completed is not None else todo_list
@@ -100,64 +144,163 @@ class TodoController:
         return [Todo(**todo) for todo in todo_list]
 
     def complete(self, todo_id: str) -> TodoModel:
-        read = self._db_handler.read_todos()
+        self._check_open()
 
-        if read.error == ReturnCode.DB_READ_ERROR:
-            return TodoModel(None, read.error)
+        if self._read_error == ReturnCode.DB_READ_ERROR:
+            return TodoModel(None, self._read_error)
 
-        found = False
-        for todo in read.todo_list:
-            if str(todo["id"]).startswith(todo_id) and len(todo_id) > 5:
-                todo["completed"] = True
-                found = True
-                break
+        todo = self._find(todo_id)
+        if todo is None:
+            return TodoModel(None, ReturnCode.ID_ERROR)
 
-        if found:
-            write = self._db_handler.write_todos(read.todo_list)
-            return TodoModel(Todo(**todo), write.error)
-        else:
-            return TodoModel(Todo(**todo), ReturnCode.ID_ERROR)
+        if not todo["completed"]:
+            todo["completed"] = True
+            self._dirty = True
 
-    def remove_completed(self) -> TodoModel:
-        read = self._db_handler.read_todos()
+        return TodoModel(Todo(**todo), ReturnCode.SUCCESS)
 
-        if read.error == ReturnCode.DB_READ_ERROR:
-            return TodoModel(None, read.error)
+    def remove_completed(self) -> TodoModel:
+        self._check_open()
 
-        todo_list = [todo for todo in read.todo_list if not todo["completed"]]
+        if self._read_error == ReturnCode.DB_READ_ERROR:
+            return TodoModel(None, self._read_error)
 
-        write = self._db_handler.write_todos(todo_list)
+        todo_list = [todo for todo in self._todo_list if not todo["completed"]]
+        if len(todo_list) != len(self._todo_list):
+            self._todo_list = todo_list
+            self._dirty = True
 
-        return TodoModel(None, write.error)
+        return TodoModel(None, ReturnCode.SUCCESS)
 
     def remove(self, todo_id: str, completed: Optional[bool] = None) -> TodoModel:
-        read = self._db_handler.read_todos()
+        self._check_open()
 
-        if read.error == ReturnCode.DB_READ_ERROR:
-            return TodoModel(None, read.error)
+        if self._read_error == ReturnCode.DB_READ_ERROR:
+            return TodoModel(None, self._read_error)
 
-        found = False
-        for todo in read.todo_list:
-            if str(todo["id"]).startswith(todo_id) and len(todo_id) > 5:
-                read.todo_list.remove(todo)
-                found = True
-                if completed is None:
-                    break
-
-        if found:
-            write = self._db_handler.write_todos(read.todo_list)
-            return TodoModel(Todo(**todo), write.error)
-        else:
+        removed = None
+        todo_list = []
+        for todo in self._todo_list:
+            if (removed is None or completed is not None) and str(todo["id"]).startswith(todo_id) and len(todo_id) > 5:
+                removed = todo
+            else:
+                todo_list.append(todo)
+
+        if removed is None:
             return TodoModel(None, ReturnCode.ID_ERROR)
 
+        self._todo_list = todo_list
+        self._dirty = True
+
+        return TodoModel(Todo(**removed), ReturnCode.SUCCESS)
+
     def remove_all(self) -> TodoModel:
-        read = self._db_handler.read_todos()
+        self._check_open()
 
-        if read.error == ReturnCode.DB_READ_ERROR:
-            return TodoModel(None, read.error)
+        if self._read_error == ReturnCode.DB_READ_ERROR:
+            return TodoModel(None, self._read_error)
 
-        todo_list = []
+        if self._todo_list:
+            self._todo_list = []
+            self._dirty = True
 
-        write = self._db_handler.write_todos(todo_list)
+        return TodoModel(None, ReturnCode.SUCCESS)
 
-        return TodoModel(None, write.error)
+    def commit(self) -> ReturnCode:
+        """Write the session's to-do list back to the database if it changed
+
+        Returns:
+            ReturnCode: Return code of the write, or SUCCESS when there was nothing to write.
+        """
+        self._check_open()
+
+        if self._dirty:
+            write = self._db_handler.write_todos(self._todo_list)
+            self.error = write.error
+            if write.error == ReturnCode.SUCCESS:
+                self._dirty = False
+        return self.error
+
+    def rollback(self) -> None:
+        """Discard the session's changes without writing them, and close the session"""
+        self._todo_list = []
+        self._dirty = False
+        self.close()
+
+    def close(self) -> None:
+        """Close the session, so it can't be used anymore"""
+        self._closed = True
+
+
+class TodoController:
+    def __init__(self, db_path: str) -> None:
+        self._db_handler = DatabaseHandler(db_path)
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_handler.db_path
+
+    @contextmanager
+    def session(self) -> Iterator[TodoSession]:
+        """Open a unit of work over the database
+
+        The to-do list is loaded once, and committed once when the block exits. If the
+        block raises, the changes are discarded and nothing is written. The session is
+        closed when the block exits and can't be used afterwards.
+
+        Yields:
+            TodoSession: The session to apply operations to.
+        """
+        session = TodoSession(self._db_handler)
+        try:
+            yield session
+        except BaseException:
+            session.rollback()
+            raise
+        if session.closed:  # Rolled back or closed inside the block, so there is nothing to commit
+            return
+        try:
+            session.commit()
+        finally:
+            session.close()
+
+    def _run(self, operation: str, *args: Any, **kwargs: Any) -> TodoModel:
+        with self.session() as session:
+            model = getattr(session, operation)(*args, **kwargs)
+        if model.error == ReturnCode.SUCCESS:
+            model = model._replace(error=session.error)
+        return model
+
+    def add(
+        self, title: str | List[str], description: str | List[str] = "", priority: TodoPriority = TodoPriority.Low
+    ) -> TodoModel:
+        """Add a to-do item to the database
+
+        Args:
+            title (str): The title of the to-do item
+            description (str, optional): A description to the to-do item. Defaults to "".
+            priority (TodoPriority, optional): To-do priority. It may be low, medium or high. Defaults to Low.
+
+        Returns:
+            Todo: The to-do item added to the database
+        """
+        return self._run("add", title, description, priority)
+
+    def get(self, todo_id: str) -> TodoModel:
+        return self._run("get", todo_id)
+
+    def list(self, completed: Optional[bool] = None, priority: Optional[int] = None) -> List[Todo]:
+        with self.session() as session:
+            return session.list(completed, priority)
+
+    def complete(self, todo_id: str) -> TodoModel:
+        return self._run("complete", todo_id)
+
+    def remove_completed(self) -> TodoModel:
+        return self._run("remove_completed")
+
+    def remove(self, todo_id: str, completed: Optional[bool] = None) -> TodoModel:
+        return self._run("remove", todo_id, completed)
+
+    def remove_all(self) -> TodoModel:
+        return self._run("remove_all")
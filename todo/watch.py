@@ -0,0 +1,232 @@
+"""Provides code to watch the to-do database for changes and redraw the terminal incrementally"""
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import shutil
+import time
+import unicodedata
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+# inotify(7) event masks
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+FileSignature = Optional[Tuple[int, int, int]]
+
+_ANSI_SEQUENCE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
+_RESET = "\x1b[0m"
+_CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+
+def file_signature(path: Path) -> FileSignature:
+    """Return a cheap signature of a file that changes whenever its contents change.
+
+    Args:
+        path (Path): Path to the file.
+
+    Returns:
+        FileSignature: Inode, size and modification time of the file, or None if it does not exist.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+
+def _inotify_init(directory: Path) -> Optional[int]:
+    """Open an inotify descriptor watching a directory, or return None if inotify is not available."""
+    if not hasattr(os, "O_NONBLOCK"):
+        return None
+    library = ctypes.util.find_library("c")
+    if library is None:
+        return None
+    try:
+        libc = ctypes.CDLL(library, use_errno=True)
+        inotify_init1 = libc.inotify_init1
+        inotify_add_watch = libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+
+    fd = inotify_init1(os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+    if fd < 0:
+        return None
+    # Watch the directory rather than the file, so the watch survives the file being replaced
+    if inotify_add_watch(fd, os.fsencode(directory), _IN_WATCH_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+
+class FileWatcher:
+    """Waits for a file to change, using inotify where available and stat polling otherwise"""
+
+    def __init__(self, path: Path, interval: float = DEFAULT_POLL_INTERVAL, use_inotify: bool = True) -> None:
+        self._path = Path(path)
+        self._interval = interval
+        self._signature = file_signature(self._path)
+        self._fd = _inotify_init(self._path.parent) if use_inotify else None
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def changed(self) -> bool:
+        """Check whether the file changed since the last time it was seen, and remember its current state."""
+        signature = file_signature(self._path)
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the file changes.
+
+        Args:
+            timeout (float, optional): Maximum number of seconds to wait. Defaults to waiting forever.
+
+        Returns:
+            bool: True if the file changed, False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.changed():
+                return True
+            remaining = self._interval if deadline is None else min(self._interval, deadline - time.monotonic())
+            if remaining <= 0:
+                return False
+            if self._fd is not None:
+                readable, _, _ = select.select([self._fd], [], [], remaining)
+                if readable:
+                    self._drain()
+            else:
+                time.sleep(remaining)
+
+    def _drain(self) -> None:
+        try:
+            while os.read(self._fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self) -> "FileWatcher":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def redraw(old_lines: List[str], new_lines: List[str]) -> str:
+    """Build the terminal output that turns a previously drawn block of lines into a new one.
+
+    Only the lines that changed are rewritten. The cursor is expected to sit on the line right
+    below the old block, and is left on the line right below the new one.
+
+    Args:
+        old_lines (List[str]): Lines currently drawn on the terminal.
+        new_lines (List[str]): Lines to draw instead.
+
+    Returns:
+        str: ANSI escape sequences and text to write to the terminal.
+    """
+    output = []
+    if old_lines:
+        output.append(f"\x1b[{len(old_lines)}F")  # Move to the first line of the old block
+    for index, line in enumerate(new_lines):
+        if index >= len(old_lines) or old_lines[index] != line:
+            output.append("\x1b[2K" + line)
+        output.append("\n")
+    if len(old_lines) > len(new_lines):
+        output.append("\x1b[J")  # Clear the leftovers of a longer old block
+    return "".join(output)
+
+
+def _cell_width(char: str) -> int:
+    """Return the number of terminal cells a character takes"""
+    if unicodedata.combining(char) or unicodedata.category(char) in ("Mn", "Me", "Cf"):
+        return 0
+    return 2 if unicodedata.east_asian_width(char) in ("W", "F") else 1
+
+
+def clip(line: str, width: int) -> str:
+    """Cut a line to at most ``width`` terminal cells, keeping its ANSI styles intact.
+
+    Wide characters, such as CJK ideographs and most emoji, count as two cells and zero-width
+    ones as none, as reported by ``unicodedata``.
+
+    Args:
+        line (str): Line to cut, possibly styled with ANSI escape sequences.
+        width (int): Maximum number of terminal cells.
+
+    Returns:
+        str: The clipped line, with its styles reset if it was cut.
+    """
+    output = []
+    cells = 0
+    position = 0
+    for match in [*_ANSI_SEQUENCE.finditer(line), None]:
+        text = line[position:match.start() if match else len(line)]
+        for index, char in enumerate(text):
+            cells += _cell_width(char)
+            if cells > width:
+                return "".join(output) + text[:index] + _RESET
+        output.append(text + (match.group() if match else ""))
+        if match:
+            position = match.end()
+    return "".join(output)
+
+
+class LiveView:
+    """Block of lines kept up to date on a terminal, rewriting only what changed"""
+
+    def __init__(self, is_tty: bool) -> None:
+        self._is_tty = is_tty
+        self._lines: List[str] = []
+        self._size: Optional[os.terminal_size] = None
+
+    def render(self, lines: List[str]) -> str:
+        """Build the output that replaces the block currently on screen with new lines.
+
+        On a terminal, lines are clipped to its width so none of them wraps, and only the lines
+        that changed are rewritten. The whole screen is redrawn instead when the terminal was
+        resized or the block doesn't fit in it, since the cursor can't reach lines that scrolled
+        away. Anywhere else the new lines are simply written out in full.
+
+        Args:
+            lines (List[str]): Lines to show.
+
+        Returns:
+            str: Text to write, empty if nothing changed.
+        """
+        if not self._is_tty:
+            if lines == self._lines:
+                return ""
+            self._lines = lines
+            return "".join(line + "\n" for line in lines)
+
+        size = shutil.get_terminal_size()
+        lines = [clip(line, size.columns) for line in lines]
+        if size == self._size and lines == self._lines:
+            return ""
+        if size == self._size and len(self._lines) < size.lines and len(lines) < size.lines:
+            output = redraw(self._lines, lines)
+        else:
+            output = _CLEAR_SCREEN + "".join(line + "\n" for line in lines)
+        self._lines = lines
+        self._size = size
+        return output